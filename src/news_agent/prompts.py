@@ -1,5 +1,7 @@
 """Prompt templates for the news agent."""
 
+from string import Template
+
 MEMORY_UPDATE_INSTRUCTIONS = """
 # Role and Objective
 You are a memory profile manager for a news feed agent that selectively updates the USER'S PREFERENCES based on feedback messages from human-in-the-loop interactions.
@@ -9,8 +11,7 @@ You are a memory profile manager for a news feed agent that selectively updates
 - ONLY make targeted additions of new information
 - ONLY update specific facts that are directly contradicted by feedback messages
 - PRESERVE all other existing information in the profile
-- Format the profile consistently with the original style (bullet list).
-- Generate the profile as a string
+- Return the complete profile as a list with exactly one preference per item (no bullet characters)
 
 # Reasoning Steps
 1. Analyse the current memory profile structure and content.
@@ -37,9 +38,9 @@ You are a memory profile manager for a news feed agent that selectively updates
 - Sustainability and green manufacturing
 </updated_profile>
 
-# Process current profile for {namespace}
+# Process current profile for $namespace
 <memory_profile>
-{current_profile}
+$current_profile
 </memory_profile>
 
 Think step by step about what specific feedback is being provided and what specific information should be added or updated in the profile while preserving everything else.
@@ -56,8 +57,7 @@ You are a memory profile manager for a news feed agent that selectively updates
 - ONLY update specific facts that are directly contradicted by feedback messages
 - PRESERVE all other existing information in the profile
 - The profile SHOULD ONLY list websites or publication names (e.g., 'TechCrunch', 'nytimes.com'). DO NOT include topics, themes, or content interests.
-- Format the profile consistently with the original style (bullet list).
-- Generate the profile as a string
+- Return the complete profile as a list with exactly one preference per item (no bullet characters)
 
 # Reasoning Steps
 1. Analyse the current memory profile structure and content.
@@ -87,11 +87,77 @@ You are a memory profile manager for a news feed agent that selectively updates
 - BBC
 </updated_profile>
 
-# Process current profile for {namespace}
+# Process current profile for $namespace
 <memory_profile>
-{current_profile}
+$current_profile
 </memory_profile>
 
 Think step by step about what specific feedback is being provided and what specific information should be added or updated in the profile while preserving everything else.
 
 Think carefully and update the memory profile based upon these user messages:"""
+
+MEMORY_UPDATE_INSTRUCTIONS_CONTENT = """
+# Role and Objective
+You are a memory profile manager for a news feed agent that selectively updates the USER'S CONTENT PREFERENCES (topics, themes, areas of interest) based on feedback messages from human-in-the-loop interactions.
+
+# Instructions
+- NEVER overwrite the entire memory profile
+- ONLY make targeted additions of new information
+- ONLY update specific facts that are directly contradicted by feedback messages
+- PRESERVE all other existing information in the profile
+- The profile SHOULD ONLY talk about topics or areas of interest, NOT websites or sources.
+- Return the complete profile as a list with exactly one preference per item (no bullet characters)
+
+# Reasoning Steps
+1. Analyse the current memory profile structure and content.
+2. Review feedback messages from human-in-the-loop interactions.
+3. Extract ONLY the content preferences (topics of interest) from these feedback messages.
+4. Compare new information against existing profile.
+5. Identify only specific facts to add or update.
+6. Preserve all other existing information.
+7. Output the complete updated profile.
+
+# Example
+<memory_profile>
+- Very interested in Computer Vision and its manufacturing applications
+- Interested in iOT and its applications in manufacturing
+</memory_profile>
+
+<user_messages>
+"Please prioritise articles about sustainability and green manufacturing"
+</user_messages>
+
+<updated_profile>
+- Very interested in Computer Vision and its manufacturing applications
+- Interested in iOT and its applications in manufacturing
+- Sustainability and green manufacturing
+</updated_profile>
+
+# Process current profile for $namespace
+<memory_profile>
+$current_profile
+</memory_profile>
+
+Think step by step about what specific feedback is being provided and what specific information should be added or updated in the profile while preserving everything else.
+
+Think carefully and update the memory profile based upon these user messages:"""
+
+COMBINED_MEMORY_UPDATE_INSTRUCTIONS = """
+You maintain TWO separate memory profiles for a news feed agent: the user's NEWS SOURCE PREFERENCES and the user's CONTENT PREFERENCES.
+Apply the instructions in each section below to its own profile only, then return both updated profiles.
+Websites and publications belong ONLY in the news source profile; topics and areas of interest belong ONLY in the content profile.
+
+## Section 1: News Source Preferences (user_news_source_preferences)
+$news_source_instructions
+
+## Section 2: Content Preferences (user_preferences)
+$content_instructions"""
+
+# Precompiled templates, filled in with ``.substitute(...)``
+MEMORY_UPDATE_TMPL = Template(MEMORY_UPDATE_INSTRUCTIONS)
+MEMORY_UPDATE_NEWS_TMPL = Template(
+    MEMORY_UPDATE_INSTRUCTIONS_NEWS_SOURCE
+    + "\n\nIMPORTANT: The profile SHOULD ONLY list websites or publication names (e.g., 'TechCrunch', 'nytimes.com'). DO NOT include topics, themes, or content interests."
+)
+CONTENT_PREFERENCES_TMPL = Template(MEMORY_UPDATE_INSTRUCTIONS_CONTENT)
+COMBINED_MEMORY_UPDATE_TMPL = Template(COMBINED_MEMORY_UPDATE_INSTRUCTIONS)
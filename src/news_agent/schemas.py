@@ -1,19 +1,32 @@
 """Pydantic schemas for structured outputs in the news agent."""
 
+from typing import List
+
 from pydantic import BaseModel, Field
 
 
 class UserPreferences(BaseModel):
     """Schema for user content preferences (topics, themes, areas of interest)."""
 
-    user_preferences: str = Field(
-        description="User's content preferences as a formatted string with bullet points for topics and areas of interest"
+    user_preferences: List[str] = Field(
+        description="User's content preferences, one topic or area of interest per item"
     )
 
 
 class UserNewsSourcePreferences(BaseModel):
     """Schema for user news source preferences (websites, publications)."""
 
-    user_news_source_preferences: str = Field(
-        description="User's news source preferences as a formatted string with bullet points for websites and publication names"
+    user_news_source_preferences: List[str] = Field(
+        description="User's news source preferences, one website or publication name per item"
+    )
+
+
+class CombinedPreferences(BaseModel):
+    """Schema for updating both preference profiles in a single call."""
+
+    user_preferences: List[str] = Field(
+        description="User's content preferences, one topic or area of interest per item"
+    )
+    user_news_source_preferences: List[str] = Field(
+        description="User's news source preferences, one website or publication name per item"
     )
@@ -0,0 +1,84 @@
+"""In-process semantic cache for crawl agent answers."""
+
+import functools
+import hashlib
+import threading
+import time
+from typing import List, Optional, Tuple
+
+import numpy as np
+from langchain_openai import OpenAIEmbeddings
+
+
+@functools.lru_cache(maxsize=1)
+def get_embedder() -> OpenAIEmbeddings:
+    """Return the shared embeddings client, created on first use."""
+    return OpenAIEmbeddings(model="text-embedding-3-small")
+
+
+@functools.lru_cache(maxsize=256)
+def embed_text(text: str) -> np.ndarray:
+    """Embed ``text`` and return it as a unit-length vector.
+
+    Memoised so the lookup on the first agent turn and the insert after the
+    tool loop finishes only pay for a single embeddings request.
+    """
+    vector = np.asarray(get_embedder().embed_query(text), dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def embed_texts(texts: List[str]) -> np.ndarray:
+    """Embed several texts with one batched request and return unit-length rows."""
+    vectors = np.asarray(get_embedder().embed_documents(texts), dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def fingerprint(*parts: str) -> str:
+    """Return a stable hash of the given strings (e.g. the preference profiles)."""
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+class SemanticCache:
+    """Cache final answers keyed by an embedding of the request.
+
+    Every entry is tagged with a fingerprint of the user's preferences and is
+    only returned for lookups carrying the same fingerprint, so editing a
+    profile naturally invalidates earlier answers.
+
+    Args:
+        threshold: Minimum cosine similarity for a cache hit
+        ttl: Seconds an answer stays valid (news goes stale quickly)
+        maxsize: Maximum number of cached answers, oldest evicted first
+    """
+
+    def __init__(self, threshold: float = 0.92, ttl: float = 3600.0, maxsize: int = 256):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        # (fingerprint, embedding, answer, created_at)
+        self._entries: List[Tuple[str, np.ndarray, str, float]] = []
+
+    def lookup(self, embedding: np.ndarray, state_fingerprint: str) -> Optional[str]:
+        """Return the cached answer most similar to ``embedding``, if any."""
+        now = time.monotonic()
+        with self._lock:
+            self._entries = [e for e in self._entries if now - e[3] < self.ttl]
+            candidates = [e for e in self._entries if e[0] == state_fingerprint]
+            if not candidates:
+                return None
+            similarities = np.stack([e[1] for e in candidates]) @ embedding
+        best = int(np.argmax(similarities))
+        if similarities[best] >= self.threshold:
+            return candidates[best][2]
+        return None
+
+    def add(self, embedding: np.ndarray, state_fingerprint: str, answer: str) -> None:
+        """Store ``answer`` for the request represented by ``embedding``."""
+        with self._lock:
+            self._entries.append((state_fingerprint, embedding, answer, time.monotonic()))
+            if len(self._entries) > self.maxsize:
+                del self._entries[: len(self._entries) - self.maxsize]
@@ -1,12 +1,390 @@
+import asyncio
+import concurrent.futures
+import functools
+import hashlib
 import os
-from typing import Any, Dict, List, Literal
+import re
+import threading
+import weakref
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Coroutine,
+    Dict,
+    Hashable,
+    List,
+    Literal,
+    Tuple,
+    TypedDict,
+)
+from urllib.parse import urlsplit
+
+import diskcache
+import httpx
+import orjson
+from cachetools import TTLCache
+from langchain_core.tools import StructuredTool, tool
+
+# Crawl and map requests walk many pages server-side and take much longer than
+# a search or extract call.
+_LONG_TIMEOUT = 60.0
+
+# Seconds to wait for a map response before racing a site: search against it.
+# Map routinely takes several seconds, so this sits near its p95 and only hedges
+# genuinely stuck requests rather than healthy ones.
+_MAP_HEDGE_DELAY = int(os.getenv("TAVILY_MAP_HEDGE_MS", "15000")) / 1000
+
+# ----------------------------------------------------------------------------------
+# Response caches: agent turns (and the prompt's retry logic) often repeat an
+# identical call, which would otherwise pay full latency and credits again. News
+# and last-day searches go stale quickly, so they get a much shorter TTL.
+# ----------------------------------------------------------------------------------
+_SEARCH_CACHE: TTLCache = TTLCache(maxsize=512, ttl=600)
+_FRESH_SEARCH_CACHE: TTLCache = TTLCache(maxsize=256, ttl=60)
+_EXTRACT_CACHE: TTLCache = TTLCache(maxsize=1024, ttl=600)
+_CRAWL_CACHE: TTLCache = TTLCache(maxsize=128, ttl=600)
+_MAP_CACHE: TTLCache = TTLCache(maxsize=128, ttl=600)
+
+# Recent search, crawl, map and per-URL extract failures reported by Tavily
+# (4xx/5xx responses: rate limits, outages, bad arguments), so an agent retrying
+# the same call within a few seconds gets the error back without another round
+# trip. Local failures (timeouts, closed loops, bugs) are not remembered.
+_NEG_CACHE: TTLCache = TTLCache(maxsize=256, ttl=10)
+
+# Requests currently on the wire, keyed like the caches
+_INFLIGHT: Dict[Hashable, asyncio.Future] = {}
+
+
+# Extract requests are split into chunks of this many URLs and sent concurrently,
+# so a large batch waits on its slowest chunk rather than on one huge request.
+_EXTRACT_CHUNK_SIZE = 10
+_EXTRACT_MAX_URLS = int(os.getenv("TAVILY_EXTRACT_MAX", "50"))
+
+# Keys kept on each extract row returned to the agent
+_EXTRACT_ROW_KEYS = frozenset({"url", "content", "images"})
+
+# Number of top search hits extracted speculatively when TAVILY_PREFETCH=1
+_PREFETCH_TOP_K = 3
+
+# Extract, crawl and map results rarely change within a day, so they are also kept
+# on disk where other workers and later runs of the agent can reuse them.
+_DISK_CACHE_TTL = 24 * 60 * 60
+
+
+_DISK_CACHE: diskcache.Cache | None = None
+_DISK_CACHE_LOCK = threading.Lock()
+
+
+def _disk_cache() -> diskcache.Cache:
+    """Return the persistent response cache, opened on first use.
+
+    diskcache does blocking SQLite and file I/O, so this (and every use of the
+    cache) runs in a worker thread via ``_disk_get_many`` / ``_disk_set_many``.
+    """
+    global _DISK_CACHE
+    with _DISK_CACHE_LOCK:
+        if _DISK_CACHE is None:
+            _DISK_CACHE = diskcache.Cache(
+                os.getenv("TAVILY_CACHE_DIR", "/tmp/tavily_cache"), size_limit=2**30
+            )
+        return _DISK_CACHE
+
+
+async def _disk_get_many(keys: List[Hashable]) -> Dict[Hashable, Any]:
+    """Read ``keys`` from the disk cache off the event loop, returning the hits."""
+
+    def read() -> Dict[Hashable, Any]:
+        cache = _disk_cache()
+        hits = {}
+        for key in keys:
+            value = cache.get(key)
+            if value is not None:
+                hits[key] = value
+        return hits
+
+    return await asyncio.to_thread(read)
+
+
+async def _disk_get(key: Hashable) -> Any:
+    """Read one ``key`` from the disk cache off the event loop."""
+    return (await _disk_get_many([key])).get(key)
+
+
+async def _disk_set_many(items: Dict[Hashable, Any]) -> None:
+    """Write ``items`` to the disk cache off the event loop."""
+
+    def write() -> None:
+        cache = _disk_cache()
+        for key, value in items.items():
+            cache.set(key, value, expire=_DISK_CACHE_TTL)
+
+    if items:
+        await asyncio.to_thread(write)
+
+
+# Optional tool arguments forwarded to the API only when the caller sets them
+_SEARCH_OPTIONAL_PARAMS = (
+    "max_results",
+    "search_depth",
+    "time_range",
+    "topic",
+    "include_images",
+    "include_image_descriptions",
+    "include_raw_content",
+    "include_domains",
+    "exclude_domains",
+)
+_MAP_OPTIONAL_PARAMS = (
+    "instructions",
+    "select_paths",
+    "select_domains",
+    "exclude_paths",
+    "exclude_domains",
+)
+
+# ----------------------------------------------------------------------------------
+# Search heuristics: query keywords mapped to a category, and the defaults each
+# category applies. When several categories match, the first in priority wins.
+# ----------------------------------------------------------------------------------
+_NEWS_KW = frozenset({"news", "recent", "latest", "breaking"})
+_FINANCE_KW = frozenset({"stock", "market", "finance", "investment"})
+_IMAGE_KW = frozenset({"image", "picture", "visual", "photo"})
+_ACADEMIC_KW = frozenset({"academic", "research", "study", "paper"})
+_ACADEMIC_DOMAINS = ("wikipedia.org", "scholar.google.com", "arxiv.org")
+_FINANCE_EXCLUDED_DOMAINS = ("reddit.com", "twitter.com")
+
+_SEARCH_CATEGORY_PRIORITY = ("news", "finance", "images", "academic")
+# One named group per category, matched case-insensitively
+_SEARCH_KEYWORD_RE = re.compile(
+    "|".join(
+        f"(?P<{category}>{'|'.join(map(re.escape, sorted(keywords)))})"
+        for category, keywords in zip(
+            _SEARCH_CATEGORY_PRIORITY, (_NEWS_KW, _FINANCE_KW, _IMAGE_KW, _ACADEMIC_KW)
+        )
+    ),
+    re.IGNORECASE,
+)
+_SEARCH_GLOBAL_DEFAULTS: Dict[str, Any] = {"max_results": 10, "search_depth": "advanced"}
+_SEARCH_CATEGORY_DEFAULTS: Dict[str, Dict[str, Any]] = {
+    "news": {"topic": "news", "time_range": "week", "max_results": 8},
+    "finance": {
+        "topic": "finance",
+        "time_range": "day",
+        "exclude_domains": _FINANCE_EXCLUDED_DOMAINS,
+    },
+    "images": {
+        "include_images": True,
+        "include_image_descriptions": True,
+        "max_results": 6,
+    },
+    "academic": {
+        "include_domains": _ACADEMIC_DOMAINS,
+        "include_raw_content": True,
+        "max_results": 12,
+    },
+}
+
+
+def _cache_key(params: Any) -> bytes:
+    """Hash fully-resolved request parameters into a compact cache key."""
+    return hashlib.blake2b(
+        orjson.dumps(params, option=orjson.OPT_SORT_KEYS, default=str), digest_size=16
+    ).digest()
+
+
+class ExtractRow(TypedDict):
+    """One extracted page as returned by ``tavily_extract_content``.
+
+    Rows are plain dicts, so the disk cache and ToolNode's JSON serialisation
+    of tool output handle them unchanged.
+    """
+
+    url: str
+    content: str
+    images: List[str]
+
+
+# ----------------------------------------------------------------------------------
+# Error payload templates; each failure only fills in its message (and URL)
+# ----------------------------------------------------------------------------------
+_SEARCH_ERROR = {"title": "Search Error", "url": "", "content": "", "score": 0.0}
+_EXTRACT_ERROR = {"url": "error", "content": "", "images": []}
+_CRAWL_ERROR = {"base_url": "", "results": [], "error": ""}
+_MAP_ERROR = {"base_url": "", "results": [], "response_time": 0.0, "error": ""}
+_INVALID_RESPONSE_ERROR = {"error": "Invalid response format"}
+_INVALID_URL_MESSAGE = "Invalid arguments: url must be an http(s) URL"
+_INVALID_LIMIT_MESSAGE = "Invalid arguments: limit must be positive"
+
+
+def _host(url: str) -> str:
+    """Return the host of ``url``, tolerating a missing scheme."""
+    return urlsplit(url if "://" in url else "https://" + url).hostname or ""
+
+
+def _is_web_url(url: str) -> bool:
+    """Return whether ``url`` names an http(s) host (a missing scheme is allowed)."""
+    if not isinstance(url, str) or not url.strip():
+        return False
+    parts = urlsplit(url if "://" in url else "https://" + url)
+    return parts.scheme in ("http", "https") and bool(parts.hostname)
 
-from langchain_core.tools import tool
-from tavily import TavilyClient
 
+# Loading the CA bundle does blocking file reads, which must stay off the event
+# loop (langgraph dev flags them as errors), so the TLS context is built once at
+# import and shared by every client.
+_SSL_CONTEXT = httpx.create_ssl_context()
+
+# One async client per event loop: pooled connections belong to the loop that
+# opened them, so a client shared across loops (asyncio.run in scripts,
+# notebooks, pytest's per-test loops) fails once its first loop closes.
+_CLIENTS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _client() -> httpx.AsyncClient:
+    """Return the Tavily REST client for the running event loop.
+
+    Within a loop, one client keeps HTTP/2 connections to api.tavily.com alive,
+    so concurrent tool calls multiplex over them instead of each paying for DNS
+    and TLS.
+    """
+    loop = asyncio.get_running_loop()
+    client = _CLIENTS.get(loop)
+    if client is None:
+        # Drop clients left behind by loops that have since closed
+        for closed in [other for other in _CLIENTS if other.is_closed()]:
+            del _CLIENTS[closed]
+        client = _CLIENTS[loop] = httpx.AsyncClient(
+            base_url="https://api.tavily.com",
+            http2=True,
+            timeout=30.0,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+            verify=_SSL_CONTEXT,
+        )
+    return client
+
+
+async def _post(
+    path: str, payload: Dict[str, Any], timeout: Any = httpx.USE_CLIENT_DEFAULT
+) -> Any:
+    """POST ``payload`` to a Tavily endpoint and return the decoded JSON response.
+
+    Bodies are (de)serialised with orjson; extract responses carry whole pages
+    of markdown and stdlib json dominates the CPU time spent on them.
+    """
+    response = await _client().post(
+        path,
+        content=orjson.dumps(payload),
+        headers={
+            "Authorization": f"Bearer {os.getenv('TAVILY_API_KEY')}",
+            "Content-Type": "application/json",
+        },
+        timeout=timeout,
+    )
+    response.raise_for_status()
+    return orjson.loads(response.content)
+
+
+def _run_sync(coro: Coroutine[Any, Any, Any]) -> Any:
+    """Run ``coro`` to completion from synchronous code."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    # Called from a thread that is already running a loop (e.g. a notebook):
+    # run on a fresh loop in a worker thread instead
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(asyncio.run, coro).result()
 
+
+def _with_sync_path(async_tool: StructuredTool) -> StructuredTool:
+    """Let an async tool also be invoked synchronously (e.g. ``news_agent.invoke``)."""
+    coroutine = async_tool.coroutine
+
+    @functools.wraps(coroutine)
+    def run(*args: Any, **kwargs: Any) -> Any:
+        return _run_sync(coroutine(*args, **kwargs))
+
+    async_tool.func = run
+    return async_tool
+
+
+def _start_once(key: Hashable, start: Callable[[], Awaitable[Any]]) -> asyncio.Future:
+    """Return the in-flight request for ``key``, starting one if there is none.
+
+    Concurrent identical calls share one request. Installing it in the
+    in-flight map happens without an intervening ``await``, so no lock is
+    needed on a single event loop. Awaiters should shield the returned task so
+    one cancelled caller doesn't cancel it for the others.
+    """
+    task = _INFLIGHT.get(key)
+    if task is None:
+        task = asyncio.ensure_future(start())
+        _INFLIGHT[key] = task
+        task.add_done_callback(lambda done: _finish_inflight(key, done))
+    return task
+
+
+def _finish_inflight(key: Hashable, task: asyncio.Future) -> None:
+    """Forget a finished request, marking any failure as retrieved.
+
+    A request may outlive every caller (e.g. a map that lost the hedge race),
+    and nobody is left to read its exception.
+    """
+    _INFLIGHT.pop(key, None)
+    if not task.cancelled():
+        task.exception()
+
+
+async def _search(
+    cache: TTLCache, key: bytes, search_params: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Perform a search, then cache its normalised response and warm extracts."""
+    try:
+        response = await _post("/search", search_params)
+    except httpx.HTTPStatusError as e:
+        _NEG_CACHE[("search", key)] = str(e)
+        raise
+    if not isinstance(response, dict):
+        response = {}
+    result = {
+        "results": response.get("results", []),
+        "response_time": response.get("response_time", 0.0),
+    }
+    cache[key] = result
+    _prefetch_extract(result["results"])
+    return result
+
+
+async def _cached_search(search_params: Dict[str, Any]) -> Dict[str, Any]:
+    """Return ``{"results", "response_time"}`` for fully-resolved search params.
+
+    Served from the response caches when possible, and concurrent calls with
+    the same params share one request. Raises if the request fails.
+    """
+    cache = (
+        _FRESH_SEARCH_CACHE
+        if search_params.get("topic") == "news"
+        or search_params.get("time_range") == "day"
+        else _SEARCH_CACHE
+    )
+    key = _cache_key(search_params)
+    if key in cache:
+        return cache[key]
+    failure = _NEG_CACHE.get(("search", key))
+    if failure is not None:
+        raise RuntimeError(failure)
+
+    task = _start_once(("search", key), lambda: _search(cache, key, search_params))
+    # Shield so one cancelled caller doesn't cancel the request for the others
+    return await asyncio.shield(task)
+
+
+@_with_sync_path
 @tool
-def tavily_search(
+async def tavily_search(
     # Required
     query: str,
     # Optional customisation parameters – all default to None which means "use heuristic defaults"
@@ -32,100 +410,176 @@ def tavily_search(
     previous behaviour).
     """
 
-    tavily_client = TavilyClient(api_key=os.getenv("TAVILY_API_KEY"))
-
     try:
-        # Base search parameters from explicit user input (if any)
+        # Explicit user input (if any). Only keep a param if the caller
+        # supplied a non-None value so it doesn't mask the heuristic layer.
+        args = locals()
+        explicit = {k: args[k] for k in _SEARCH_OPTIONAL_PARAMS if args[k] is not None}
+
+        # Context-aware tweaks: one scan of the query finds every keyword
+        # category, then the highest-priority one supplies its defaults.
+        categories = {match.lastgroup for match in _SEARCH_KEYWORD_RE.finditer(query)}
+        category = next((c for c in _SEARCH_CATEGORY_PRIORITY if c in categories), None)
+
+        # Later layers win: global defaults < category defaults < caller's values
         search_params: Dict[str, Any] = {
+            **_SEARCH_GLOBAL_DEFAULTS,
+            **_SEARCH_CATEGORY_DEFAULTS.get(category, {}),
+            **explicit,
             "query": query,
         }
 
-        # Only populate a param if the caller supplied a non-None value. This
-        # prevents us from overwriting the heuristic layer later on.
-        if max_results is not None:
-            search_params["max_results"] = max_results
-        if search_depth is not None:
-            search_params["search_depth"] = search_depth
-        if time_range is not None:
-            search_params["time_range"] = time_range
-        if topic is not None:
-            search_params["topic"] = topic
-        if include_images is not None:
-            search_params["include_images"] = include_images
-        if include_image_descriptions is not None:
-            search_params["include_image_descriptions"] = include_image_descriptions
-        if include_raw_content is not None:
-            search_params["include_raw_content"] = include_raw_content
-        if include_domains is not None:
-            search_params["include_domains"] = include_domains
-        if exclude_domains is not None:
-            search_params["exclude_domains"] = exclude_domains
-
-        # ------------------------------------------------------------------
-        # Heuristic defaults – applied **only** for parameters that the caller
-        # did *not* specify explicitly above.
-        # ------------------------------------------------------------------
-        user_query = query.lower()
-
-        def _set_default(key: str, value: Any) -> None:
-            """Helper that sets a default only if the caller didn't override."""
-            if key not in search_params:
-                search_params[key] = value
-
-        # Global sensible defaults
-        _set_default("max_results", 10)
-        _set_default("search_depth", "advanced")
-
-        # Context-aware tweaks
-        if any(word in user_query for word in ["news", "recent", "latest", "breaking"]):
-            _set_default("topic", "news")
-            _set_default("time_range", "week")
-            _set_default("max_results", 8)
-        elif any(
-            word in user_query for word in ["stock", "market", "finance", "investment"]
-        ):
-            _set_default("topic", "finance")
-            _set_default("time_range", "day")
-            _set_default("exclude_domains", ["reddit.com", "twitter.com"])
-        elif any(
-            word in user_query for word in ["image", "picture", "visual", "photo"]
-        ):
-            _set_default("include_images", True)
-            _set_default("include_image_descriptions", True)
-            _set_default("max_results", 6)
-        elif any(
-            word in user_query for word in ["academic", "research", "study", "paper"]
-        ):
-            _set_default(
-                "include_domains",
-                [
-                    "wikipedia.org",
-                    "scholar.google.com",
-                    "arxiv.org",
-                ],
-            )
-            _set_default("include_raw_content", True)
-            _set_default("max_results", 12)
+        # Perform the search (or reuse a cached or in-flight identical one)
+        return (await _cached_search(search_params))["results"]
+
+    except Exception as e:
+        return [{**_SEARCH_ERROR, "content": f"Error searching: {e!s}"}]
 
-        # Perform the search
-        response = tavily_client.search(**search_params)
 
-        # Normalise and return results
-        return response.get("results", []) if isinstance(response, dict) else []
+async def _extract_chunk(chunk: List[str]) -> Tuple[List[str], Dict[str, ExtractRow]]:
+    """Extract one chunk of URLs, from the disk cache where possible.
 
-    except Exception as e:
-        return [
+    Returns the chunk with its rows keyed by URL; the API may rewrite a URL,
+    so some keys need not appear in the chunk.
+    """
+    rows: Dict[str, ExtractRow] = {}
+    on_disk = await _disk_get_many([("extract", url) for url in chunk])
+    for (_, url), row in on_disk.items():
+        _EXTRACT_CACHE[url] = rows[url] = row
+    remaining = [url for url in chunk if url not in rows]
+    if not remaining:
+        return chunk, rows
+
+    try:
+        response = await _post(
+            "/extract",
             {
-                "title": "Search Error",
-                "url": "",
-                "content": f"Error searching: {str(e)}",
-                "score": 0.0,
-            }
-        ]
+                "urls": remaining,
+                "include_images": False,
+                "extract_depth": "advanced",
+                "format": "markdown",
+            },
+        )
+    except httpx.HTTPStatusError as e:
+        for url in remaining:
+            _NEG_CACHE[("extract", url)] = str(e)
+        raise
+
+    fetched: Dict[Hashable, ExtractRow] = {}
+    if isinstance(response, dict) and "results" in response:
+        for row in response["results"]:
+            if not isinstance(row, dict):
+                continue
+            # Reshape the response dict in place rather than copying it
+            row["content"] = row.pop("raw_content", "")
+            row.setdefault("url", "")
+            row.setdefault("images", [])
+            for extra in row.keys() - _EXTRACT_ROW_KEYS:
+                del row[extra]
+            rows[row["url"]] = row
+            _EXTRACT_CACHE[row["url"]] = row
+            fetched[("extract", row["url"])] = row
+    await _disk_set_many(fetched)
+    return chunk, rows
+
+
+def _start_extracts(urls: List[str]) -> Dict[str, asyncio.Future]:
+    """Return the in-flight extract for each of ``urls``, starting any not running.
+
+    URLs already being extracted (e.g. by a prefetch) join that request; the
+    rest are split into chunks sent concurrently, so a large batch waits on its
+    slowest chunk rather than on one huge request. Each chunk is registered
+    under every URL it covers.
+    """
+    tasks = {
+        url: _INFLIGHT[("extract", url)]
+        for url in urls
+        if ("extract", url) in _INFLIGHT
+    }
+    missing = [url for url in urls if url not in tasks]
+    for i in range(0, len(missing), _EXTRACT_CHUNK_SIZE):
+        chunk = missing[i : i + _EXTRACT_CHUNK_SIZE]
+        chunk_task = asyncio.ensure_future(_extract_chunk(chunk))
+        for url in chunk:
+            tasks[url] = _start_once(("extract", url), lambda: chunk_task)
+    return tasks
+
+
+async def _extract(urls: List[str]) -> List[ExtractRow]:
+    """Extract ``urls`` (already deduplicated), fetching only uncached ones.
+
+    A failed chunk becomes an error row; the other chunks' results are still
+    returned.
+    """
+    rows = {url: _EXTRACT_CACHE[url] for url in urls if url in _EXTRACT_CACHE}
+    # URLs whose extract failed moments ago get that error back without a retry
+    recent_failures = {
+        url: _NEG_CACHE[("extract", url)]
+        for url in urls
+        if url not in rows and ("extract", url) in _NEG_CACHE
+    }
+    tasks = _start_extracts(
+        [url for url in urls if url not in rows and url not in recent_failures]
+    )
+    # Shield so one cancelled caller doesn't cancel a chunk shared with others
+    outcomes = await asyncio.gather(
+        *(asyncio.shield(task) for task in dict.fromkeys(tasks.values())),
+        return_exceptions=True,
+    )
+
+    # Process the outcomes and format them
+    errors = [
+        {**_EXTRACT_ERROR, "content": f"Error extracting content: {failure}"}
+        for failure in dict.fromkeys(recent_failures.values())
+    ]
+    rewritten: Dict[str, ExtractRow] = {}
+    for outcome in outcomes:
+        if isinstance(outcome, Exception):
+            errors.append(
+                {**_EXTRACT_ERROR, "content": f"Error extracting content: {outcome!s}"}
+            )
+            continue
+        chunk, chunk_rows = outcome
+        ours = [url for url in chunk if url in tasks]
+        rows.update((url, chunk_rows[url]) for url in ours if url in chunk_rows)
+        # Rows under a URL nobody asked for are ours only if one of our URLs
+        # in this chunk came back without a row of its own
+        if any(url not in chunk_rows for url in ours):
+            rewritten.update(
+                (url, row) for url, row in chunk_rows.items() if url not in chunk
+            )
+
+    # Keep the caller's URL order; rows whose URL the API rewrote go last
+    ordered = [rows[url] for url in urls if url in rows]
+    return ordered + [row for url, row in rewritten.items() if url not in rows] + errors
+
+
+def _prefetch_extract(results: List[Dict[str, Any]]) -> None:
+    """Start extracting the top search results in the background.
+
+    The agent usually extracts the best hits right after a search, so doing it
+    while the model is still generating hides a full round trip. The requests
+    are registered as in flight, so the agent's extract joins them instead of
+    fetching the same URLs again. Disabled unless ``TAVILY_PREFETCH=1`` since
+    it spends extract credits speculatively.
+    """
+    if os.getenv("TAVILY_PREFETCH") != "1":
+        return
+    urls = list(
+        dict.fromkeys(
+            r["url"]
+            for r in results[:_PREFETCH_TOP_K]
+            # _extract_chunk also skips URLs cached on disk
+            if r.get("url") and r["url"] not in _EXTRACT_CACHE
+        )
+    )
+    # The in-flight map keeps the tasks referenced until they finish
+    _start_extracts(urls)
 
 
+@_with_sync_path
 @tool
-def tavily_extract_content(urls: List[str]) -> List[Dict[str, Any]]:
+async def tavily_extract_content(urls: List[str]) -> List[ExtractRow]:
     """Extract content from web pages using Tavily.
 
     Args:
@@ -134,40 +588,17 @@ def tavily_extract_content(urls: List[str]) -> List[Dict[str, Any]]:
     Returns:
         List of dictionaries containing extracted content with keys: url, content, images
     """
-    tavily_client = TavilyClient(api_key=os.getenv("TAVILY_API_KEY"))
-
-    try:
-        response = tavily_client.extract(
-            urls=urls, include_images=False, extract_depth="advanced", format="markdown"
-        )
-
-        # Process the response and format it
-        extracted_results = []
-        if isinstance(response, dict) and "results" in response:
-            for result in response["results"]:
-                if isinstance(result, dict):
-                    extracted_results.append(
-                        {
-                            "url": result.get("url", ""),
-                            "content": result.get("raw_content", ""),
-                            "images": result.get("images", []),
-                        }
-                    )
-
-        return extracted_results
-
-    except Exception as e:
-        return [
-            {
-                "url": "error",
-                "content": f"Error extracting content: {str(e)}",
-                "images": [],
-            }
-        ]
+    # Every URL sent costs a full page fetch, so drop blanks and duplicates and
+    # cap the batch size
+    urls = list(dict.fromkeys(u for u in urls if isinstance(u, str) and u))
+    if not urls:
+        return []
+    return await _extract(urls[:_EXTRACT_MAX_URLS])
 
 
+@_with_sync_path
 @tool
-def tavily_crawl(url: str) -> Dict[str, Any]:
+async def tavily_crawl(url: str) -> Dict[str, Any]:
     """Crawl a website starting from a base URL using Tavily.
 
     Args:
@@ -177,25 +608,53 @@ def tavily_crawl(url: str) -> Dict[str, Any]:
     Returns:
         Dictionary containing crawl results with extracted content from multiple pages
     """
-    tavily_client = TavilyClient(api_key=os.getenv("TAVILY_API_KEY"))
+    # Reject unusable arguments before spending a round trip on them
+    if not _is_web_url(url):
+        return {**_CRAWL_ERROR, "base_url": url, "error": _INVALID_URL_MESSAGE}
+
+    if url in _CRAWL_CACHE:
+        return _CRAWL_CACHE[url]
+    cached = await _disk_get(("crawl", url))
+    if cached is not None:
+        _CRAWL_CACHE[url] = cached
+        return cached
+    failure = _NEG_CACHE.get(("crawl", url))
+    if failure is not None:
+        return {**_CRAWL_ERROR, "base_url": url, "error": f"Crawl failed: {failure}"}
 
     try:
-        response = tavily_client.crawl(url, max_depth=1, max_breadth=20, limit=50)
-        return (
-            response
-            if isinstance(response, dict)
-            else {"error": "Invalid response format"}
+        response = await _post(
+            "/crawl",
+            {"url": url, "max_depth": 1, "max_breadth": 20, "limit": 50},
+            timeout=_LONG_TIMEOUT,
         )
+        if not isinstance(response, dict):
+            return {**_INVALID_RESPONSE_ERROR}
+        _CRAWL_CACHE[url] = response
+        await _disk_set_many({("crawl", url): response})
+        return response
     except Exception as e:
-        return {
-            "base_url": url,
-            "results": [],
-            "error": f"Crawl failed: {str(e)}",
-        }
+        if isinstance(e, httpx.HTTPStatusError):
+            _NEG_CACHE[("crawl", url)] = str(e)
+        return {**_CRAWL_ERROR, "base_url": url, "error": f"Crawl failed: {e!s}"}
+
+
+async def _map(key: bytes, map_params: Dict[str, Any]) -> Any:
+    """Run a map request, caching a successful response in memory and on disk."""
+    try:
+        response = await _post("/map", map_params, timeout=_LONG_TIMEOUT)
+    except httpx.HTTPStatusError as e:
+        _NEG_CACHE[("map", key)] = str(e)
+        raise
+    if isinstance(response, dict):
+        _MAP_CACHE[key] = response
+        await _disk_set_many({("map", key): response})
+    return response
 
 
+@_with_sync_path
 @tool
-def tavily_map_site(
+async def tavily_map_site(
     url: str,
     instructions: str = "",
     max_depth: int = 1,
@@ -224,65 +683,116 @@ def tavily_map_site(
     Returns:
         Dictionary containing base_url, results (list of discovered URLs), and response_time
     """
-    tavily_client = TavilyClient(api_key=os.getenv("TAVILY_API_KEY"))
-
+    # Reject unusable arguments before spending a round trip on them
+    if not _is_web_url(url):
+        return {**_MAP_ERROR, "base_url": url, "error": _INVALID_URL_MESSAGE}
+    if limit <= 0:
+        return {**_MAP_ERROR, "base_url": url, "error": _INVALID_LIMIT_MESSAGE}
+
+    # Use correct parameter names based on official documentation
+    args = locals()
+    map_params = {
+        "url": url,
+        "max_depth": max_depth,
+        "max_breadth": max_breadth,
+        "limit": limit,
+        "allow_external": allow_external,
+        # Only add optional parameters if provided, deduping pattern lists
+        **{
+            k: list(dict.fromkeys(args[k])) if isinstance(args[k], list) else args[k]
+            for k in _MAP_OPTIONAL_PARAMS
+            if args[k]
+        },
+    }
+
+    key = _cache_key(map_params)
+    if key in _MAP_CACHE:
+        return _MAP_CACHE[key]
+    cached = await _disk_get(("map", key))
+    if cached is not None:
+        _MAP_CACHE[key] = cached
+        return cached
+
+    def _map_response() -> Dict[str, Any] | None:
+        """Return the map response if the request has finished successfully."""
+        if (
+            map_task.done()
+            and map_task.exception() is None
+            and isinstance(map_task.result(), dict)
+        ):
+            return map_task.result()
+        return None
+
+    # The map request is never cancelled: if the search fallback wins, map keeps
+    # running in the background and caches its sitemap for the next call, and an
+    # identical call meanwhile joins it instead of starting another
+    failure = _NEG_CACHE.get(("map", key))
+    if failure is not None:
+        # Map failed moments ago: skip straight to the search fallback
+        map_task = asyncio.get_running_loop().create_future()
+        map_task.set_exception(RuntimeError(failure))
+    else:
+        map_task = _start_once(("map", key), lambda: _map(key, map_params))
+    search_task = None
     try:
-        # Use correct parameter names based on official documentation
-        map_params = {
-            "url": url,
-            "max_depth": max_depth,
-            "max_breadth": max_breadth,
-            "limit": limit,
-            "allow_external": allow_external,
-        }
-
-        # Only add optional parameters if provided
-        if instructions:
-            map_params["instructions"] = instructions
-        if select_paths:
-            map_params["select_paths"] = select_paths
-        if select_domains:
-            map_params["select_domains"] = select_domains
-        if exclude_paths:
-            map_params["exclude_paths"] = exclude_paths
-        if exclude_domains:
-            map_params["exclude_domains"] = exclude_domains
-
-        response = tavily_client.map(**map_params)
-        return (
-            response
-            if isinstance(response, dict)
-            else {"error": "Invalid response format"}
-        )
-
-    except Exception as e:
-        # If map fails, fall back to search to discover URLs
-        try:
-            search_query = f"site:{url.split('//')[1].split('/')[0]}"
-            if instructions:
-                search_query += f" {instructions}"
-
-            search_response = tavily_client.search(
-                query=search_query, max_results=min(limit, 10), search_depth="basic"
+        # Hedge: if map hasn't succeeded within the delay, race a site: search
+        # against it instead of waiting for map to fail or time out first
+        await asyncio.wait({map_task}, timeout=_MAP_HEDGE_DELAY)
+        response = _map_response()
+        if response is None:
+            search_query = f"site:{_host(url)}" + (
+                f" {instructions}" if instructions else ""
+            )
+            search_task = asyncio.ensure_future(
+                _cached_search(
+                    {
+                        "query": search_query,
+                        "max_results": min(limit, 10),
+                        "search_depth": "basic",
+                    }
+                )
             )
 
-            # Extract URLs from search results
-            discovered_urls = []
-            for result in search_response.get("results", []):
-                if result.get("url"):
-                    discovered_urls.append(result["url"])
-
-            return {
-                "base_url": url,
-                "results": discovered_urls,
-                "response_time": search_response.get("response_time", 0.0),
-                "fallback_used": "search",
-                "original_error": f"Map failed: {str(e)}",
-            }
-        except Exception as search_error:
-            return {
-                "base_url": url,
-                "results": [],
-                "response_time": 0.0,
-                "error": f"Both map and search failed. Map: {str(e)}, Search: {str(search_error)}",
-            }
+            pending = {map_task, search_task}
+            while response is None and pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                # Prefer the real sitemap when both finish together
+                response = _map_response()
+                if (
+                    response is None
+                    and search_task in done
+                    and search_task.exception() is None
+                ):
+                    search_response = search_task.result()
+                    map_error = (
+                        map_task.exception() or _INVALID_RESPONSE_ERROR["error"]
+                        if map_task.done()
+                        else f"no response within {_MAP_HEDGE_DELAY}s"
+                    )
+
+                    return {
+                        "base_url": url,
+                        "results": [
+                            r["url"] for r in search_response["results"] if r.get("url")
+                        ],
+                        "response_time": search_response["response_time"],
+                        "fallback_used": "search",
+                        "original_error": f"Map failed: {map_error!s}",
+                    }
+
+            if response is None:
+                map_error = map_task.exception() or _INVALID_RESPONSE_ERROR["error"]
+                return {
+                    **_MAP_ERROR,
+                    "base_url": url,
+                    "error": f"Both map and search failed. Map: {map_error!s}, Search: {search_task.exception()!s}",
+                }
+    finally:
+        # Stop waiting on a losing search; its shielded request still finishes
+        # into the search cache
+        if search_task is not None:
+            search_task.cancel()
+
+    return response
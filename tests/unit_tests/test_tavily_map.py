@@ -0,0 +1,147 @@
+"""Tests for the hedged map/search race in ``tavily_map_site``.
+
+``_post`` is stubbed, so no request leaves the process.
+"""
+
+import asyncio
+from typing import Any, Dict, List
+
+import httpx
+import pytest
+
+from news_agent.tools import tavily_tools
+
+_URL = "https://example.com"
+_MAP_RESPONSE = {"base_url": _URL, "results": [f"{_URL}/a", f"{_URL}/b"]}
+_SEARCH_RESPONSE = {
+    "results": [{"url": f"{_URL}/s1"}, {"url": f"{_URL}/s2"}],
+    "response_time": 0.1,
+}
+
+
+def _status_error(path: str, status: int) -> httpx.HTTPStatusError:
+    request = httpx.Request("POST", f"https://api.tavily.com{path}")
+    response = httpx.Response(status, request=request)
+    return httpx.HTTPStatusError(f"{status} error", request=request, response=response)
+
+
+class _StubPost:
+    """Stand-in for ``_post`` that answers each endpoint after a set delay."""
+
+    def __init__(self, **endpoints: Any) -> None:
+        # endpoint name -> (delay in seconds, response or exception to raise)
+        self.endpoints = endpoints
+        self.calls: List[str] = []
+
+    async def __call__(
+        self, path: str, payload: Dict[str, Any], timeout: Any = None
+    ) -> Any:
+        self.calls.append(path)
+        delay, outcome = self.endpoints[path.strip("/")]
+        await asyncio.sleep(delay)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+@pytest.fixture(autouse=True)
+def _isolated_tools(monkeypatch: pytest.MonkeyPatch, tmp_path) -> None:
+    """Give every test empty caches, a private disk cache and a short hedge."""
+    for cache in (
+        tavily_tools._SEARCH_CACHE,
+        tavily_tools._FRESH_SEARCH_CACHE,
+        tavily_tools._MAP_CACHE,
+        tavily_tools._NEG_CACHE,
+    ):
+        cache.clear()
+    tavily_tools._INFLIGHT.clear()
+    monkeypatch.setenv("TAVILY_CACHE_DIR", str(tmp_path))
+    monkeypatch.delenv("TAVILY_PREFETCH", raising=False)
+    monkeypatch.setattr(tavily_tools, "_DISK_CACHE", None)
+    monkeypatch.setattr(tavily_tools, "_MAP_HEDGE_DELAY", 0.05)
+
+
+def _stub_post(monkeypatch: pytest.MonkeyPatch, **endpoints: Any) -> _StubPost:
+    stub = _StubPost(**endpoints)
+    monkeypatch.setattr(tavily_tools, "_post", stub)
+    return stub
+
+
+def _map_site(**args: Any) -> Dict[str, Any]:
+    return tavily_tools.tavily_map_site.invoke({"url": _URL, **args})
+
+
+def test_map_wins(monkeypatch: pytest.MonkeyPatch) -> None:
+    stub = _stub_post(
+        monkeypatch, map=(0, _MAP_RESPONSE), search=(0, _SEARCH_RESPONSE)
+    )
+
+    assert _map_site() == _MAP_RESPONSE
+    assert stub.calls == ["/map"]
+
+
+def test_search_wins_while_map_pending(monkeypatch: pytest.MonkeyPatch) -> None:
+    stub = _stub_post(
+        monkeypatch, map=(0.2, _MAP_RESPONSE), search=(0, _SEARCH_RESPONSE)
+    )
+
+    async def run() -> Dict[str, Any]:
+        response = await tavily_tools.tavily_map_site.ainvoke({"url": _URL})
+        # The losing map keeps running and caches its sitemap for the next call
+        await asyncio.sleep(0.3)
+        return response
+
+    response = asyncio.run(run())
+    assert response["fallback_used"] == "search"
+    assert response["results"] == [f"{_URL}/s1", f"{_URL}/s2"]
+    assert "no response within" in response["original_error"]
+    assert list(tavily_tools._MAP_CACHE.values()) == [_MAP_RESPONSE]
+
+    assert _map_site() == _MAP_RESPONSE
+    assert stub.calls == ["/map", "/search"]
+
+
+def test_map_fails_fast(monkeypatch: pytest.MonkeyPatch) -> None:
+    stub = _stub_post(
+        monkeypatch, map=(0, _status_error("/map", 503)), search=(0, _SEARCH_RESPONSE)
+    )
+
+    response = _map_site()
+    assert response["fallback_used"] == "search"
+    assert response["original_error"].startswith("Map failed: 503 error")
+
+    # The failure is remembered briefly: a retry goes straight to the (cached) search
+    assert _map_site() == response
+    assert stub.calls == ["/map", "/search"]
+
+
+def test_both_fail(monkeypatch: pytest.MonkeyPatch) -> None:
+    _stub_post(
+        monkeypatch,
+        map=(0, _status_error("/map", 503)),
+        search=(0, _status_error("/search", 429)),
+    )
+
+    response = _map_site()
+    assert response["results"] == []
+    assert response["error"] == (
+        "Both map and search failed. Map: 503 error, Search: 429 error"
+    )
+
+
+def test_concurrent_identical_calls_share_one_request(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    stub = _stub_post(
+        monkeypatch, map=(0.02, _MAP_RESPONSE), search=(0, _SEARCH_RESPONSE)
+    )
+
+    async def run() -> List[Dict[str, Any]]:
+        return await asyncio.gather(
+            tavily_tools.tavily_map_site.ainvoke({"url": _URL}),
+            tavily_tools.tavily_map_site.ainvoke({"url": _URL}),
+        )
+
+    assert asyncio.run(run()) == [_MAP_RESPONSE, _MAP_RESPONSE]
+    assert stub.calls == ["/map"]
+    assert not tavily_tools._INFLIGHT